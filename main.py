@@ -3,81 +3,126 @@
 # ------------------------------------------------------------------
 
 import os
-import shutil
+import sys
 import time
-from multiprocessing import Process, Queue
-from pscad_utils import Sim, run_simulation, collect_results, convert_results_to_csv
+import shutil
+import argparse
+import logging
+import multiprocessing as mp
+from logging.handlers import QueueListener
+from pscad_utils import Sim, COPY_MODES, init_worker_logging, run_simulation, collect_results, convert_results_to_csv
+
+# Windows only supports spawn. Elsewhere use a forkserver with the PSCAD
+# bindings preloaded, so each worker doesn't re-import them.
+if sys.platform == "win32":
+    ctx = mp.get_context("spawn")
+else:
+    ctx = mp.get_context("forkserver")
+    ctx.set_forkserver_preload(["pscad_utils", "mhi.pscad", "mhi.pscad.utilities.file"])
 
 # ------------------------------------------------------------------
 # Simulation Cases and parameters
 # ------------------------------------------------------------------
 TIME_PARAMS = (5, 5, 250)  # duration (s), time-step (µs), sample-step (µs)
+LAUNCH_TIMEOUT = 30  # max wait (s) for a worker to load PSCAD before starting the next
+LAUNCH_POLL = 0.5  # how often (s) to check the worker is still alive while waiting
 SIMULATIONS = []
 
 sim1 = Sim("D_1000")
 SIMULATIONS.append(sim1)
 
-sim2 = Sim('D_100')
-sim2.D = 1/100
+sim2 = Sim('D_100', D=1/100)
 SIMULATIONS.append(sim2)
 
-sim3 = Sim("D_10")
-sim3.D = 1/10
+sim3 = Sim("D_10", D=1/10)
 SIMULATIONS.append(sim3)
 
-sim4 = Sim("D_1")
-sim4.D = 1/1
+sim4 = Sim("D_1", D=1/1)
 SIMULATIONS.append(sim4)
 # ------------------------------------------------------------------
 # Main entry-point
 # ------------------------------------------------------------------
 if __name__ == "__main__":
-    print("************ Parallel Simulation START ************")
-
-    # --- Configuration ----------------------------------------------------------
-    SETTINGS = {"fortran_version": "GFortran 4.6.2"}
-    FORTRAN_EXT = ".gf46"
-    PROJECT_NAME = "GFMBESS20251112"
-
-    WORKING_DIR = os.getcwd() + os.sep
-    SIMULATIONS_DIR = os.path.join(WORKING_DIR, "all_simulations")
-
-    # Clean/create output folder
-    if os.path.exists(SIMULATIONS_DIR):
-        shutil.rmtree(SIMULATIONS_DIR)
-    os.makedirs(SIMULATIONS_DIR)
-
-    # --- Launch workers ---------------------------------------------------------
-    results_queue = Queue()
-    processes = []
-
-    for simulation in SIMULATIONS:
-        p = Process(
-            target=run_simulation,
-            args=(
-                simulation,
-                results_queue,
-                WORKING_DIR,
-                PROJECT_NAME,
-                SETTINGS,
-                FORTRAN_EXT,
-                SIMULATIONS_DIR,
-                TIME_PARAMS,
-            ),
-        )
-        processes.append(p)
-        print(f"[START] {simulation.test_name}")
-        p.start()
-        time.sleep(5)  # stagger launches to avoid PSCAD conflicts
-
-    # --- Wait for completion ----------------------------------------------------
-    for p in processes:
-        p.join()
-
-    # --- Collect results --------------------------------------------------------
-    test_results = collect_results(results_queue)
-
-    # --- Convert .psout → .csv --------------------------------------------------
-    convert_results_to_csv(test_results, SIMULATIONS_DIR, WORKING_DIR)
-
-    print("************ Parallel Simulation END ************")
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Run PSCAD simulation cases in parallel")
+    parser.add_argument(
+        "--copy-mode",
+        choices=COPY_MODES,
+        default="copy",
+        help="how each case gets its project file: 'copy' (reflink/fast copy) "
+             "or 'link' (hardlink, only safe if PSCAD never saves the project)",
+    )
+    parser.add_argument(
+        "--csv",
+        action="store_true",
+        help="also export each case's .psout data to <case>/<case>.csv",
+    )
+    args = parser.parse_args()
+
+    # Workers and this process log through one queue; a single listener
+    # thread writes the records so lines from parallel cases don't interleave
+    log_queue = ctx.Queue()
+    listener = QueueListener(log_queue, logging.StreamHandler(sys.stdout))
+    listener.start()
+    try:
+        init_worker_logging(log_queue)
+        log = logging.getLogger(__name__)
+        log.setLevel(logging.INFO)
+
+        log.info("************ Parallel Simulation START ************")
+
+        # --- Configuration ----------------------------------------------------------
+        SETTINGS = {"fortran_version": "GFortran 4.6.2"}
+        FORTRAN_EXT = ".gf46"
+        PROJECT_NAME = "GFMBESS20251112"
+
+        WORKING_DIR = os.getcwd() + os.sep
+        SIMULATIONS_DIR = os.path.join(WORKING_DIR, "all_simulations")
+
+        # Clean/create output folder
+        if os.path.exists(SIMULATIONS_DIR):
+            shutil.rmtree(SIMULATIONS_DIR)
+        os.makedirs(SIMULATIONS_DIR)
+
+        # --- Launch workers ---------------------------------------------------------
+        processes = []
+
+        for simulation in SIMULATIONS:
+            launch_gate = ctx.Event()
+            p = ctx.Process(
+                target=run_simulation,
+                args=(
+                    simulation,
+                    WORKING_DIR,
+                    PROJECT_NAME,
+                    SETTINGS,
+                    FORTRAN_EXT,
+                    SIMULATIONS_DIR,
+                    TIME_PARAMS,
+                    args.copy_mode,
+                    launch_gate,
+                    log_queue,
+                ),
+            )
+            processes.append(p)
+            log.info(f"[START] {simulation.test_name}")
+            p.start()
+            # wait until PSCAD is loaded to avoid conflicts, unless the worker died
+            deadline = time.monotonic() + LAUNCH_TIMEOUT
+            while p.is_alive() and time.monotonic() < deadline:
+                if launch_gate.wait(timeout=LAUNCH_POLL):
+                    break
+
+        # --- Wait for completion ----------------------------------------------------
+        for p in processes:
+            p.join()
+
+        # --- Collect results --------------------------------------------------------
+        test_results = collect_results(SIMULATIONS_DIR, len(SIMULATIONS))
+
+        # --- Convert .psout → .csv (optional, see load_results) ----------------------
+        if args.csv:
+            convert_results_to_csv(test_results, SIMULATIONS_DIR, mp_context=ctx)
+
+        log.info("************ Parallel Simulation END ************")
+    finally:
+        listener.stop()
\ No newline at end of file
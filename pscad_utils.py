@@ -3,27 +3,48 @@
 # ------------------------------------------------------------------
 
 import os
+import sys
+import csv
+import glob
+import json
 import shutil
-from multiprocessing import Queue
+import logging
+from dataclasses import dataclass
+from typing import TYPE_CHECKING
+from logging.handlers import QueueHandler
+from itertools import chain
+from functools import partial
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing.synchronize import Event
 import mhi.pscad
 from mhi.pscad.utilities.file import OutFile
 
+if TYPE_CHECKING:
+    import numpy as np
+
+# Print to stdout by default; init_worker_logging swaps this for a log queue
+log = logging.getLogger(__name__)
+log.setLevel(logging.INFO)
+_stdout_handler = logging.StreamHandler(sys.stdout)
+log.addHandler(_stdout_handler)
+log.propagate = False  # don't print twice if the caller configures root logging
+
 # ------------------------------------------------------------------
 # Simulation Base Case
 # ------------------------------------------------------------------
 
+@dataclass(slots=True, frozen=True)
 class Sim:
-    def __init__(self, test_name, prefA = 0, scl = 5, xr = 5, H = 2, D = 1/1000, fdroop = 0.01, inverter_size = 1.1, no_inverters = 1, POD_en = 0):
-        self.test_name = test_name
-        self.prefA = prefA # plant acitve power setpoint (pu)
-        self.scl = scl # grid short circuit level
-        self.xr = xr # grid x/r ratio
-        self.H = H # inertia
-        self.D = D # damping
-        self.fdroop = fdroop
-        self.inverter_size = inverter_size # capacity of single inverter module (MVA)
-        self.no_inverters = no_inverters # parallel inverters in plant
-        self.POD_en = POD_en # Power oscillation damper 
+    test_name: str
+    prefA: float = 0 # plant acitve power setpoint (pu)
+    scl: float = 5 # grid short circuit level
+    xr: float = 5 # grid x/r ratio
+    H: float = 2 # inertia
+    D: float = 1/1000 # damping
+    fdroop: float = 0.01
+    inverter_size: float = 1.1 # capacity of single inverter module (MVA)
+    no_inverters: int = 1 # parallel inverters in plant
+    POD_en: int = 0 # Power oscillation damper 
 
 # ------------------------------------------------------------------
 # Component Parameter Setters
@@ -32,14 +53,14 @@ def set_PrefA(value: float, project) -> None:
     """Update the PrefA slider value."""
     slider = project.component(830232143)
     slider.parameters(Value=value)
-    print(f"[INFO] PrefA set to {value}")
+    log.info(f"[INFO] PrefA set to {value}")
 
 
 def set_SCL(value: float, project) -> None:
     """Update the SCL slider value."""
     slider = project.component(1715080837)
     slider.parameters(Value=value)
-    print(f"[INFO] SCL set to {value}")
+    log.info(f"[INFO] SCL set to {value}")
 
 
 def set_XR_ratio(value: float, project) -> None:
@@ -47,89 +68,217 @@ def set_XR_ratio(value: float, project) -> None:
     grid_model = project.component(1186628671)
     slider = grid_model.canvas().component(1448664316)
     slider.parameters(Value=value)
-    print(f"[INFO] X/R set to {value}")
+    log.info(f"[INFO] X/R set to {value}")
 
-def set_H(value: float, project) -> None:
+def set_H(value: float, converter_controls) -> None:
     """Update the inertia constant H of the VSM controller """
-    BESS_plant0 = project.component(477036609).canvas()
-    BESS_plant1 = BESS_plant0.component(1672393785).canvas()
-    inverter_model = BESS_plant1.component(102488955).canvas()
-    converter_controls = inverter_model.component(952269080).canvas()
     slider_H = converter_controls.component(999528713) 
     slider_H.parameters(Value=value)
-    print(f"[INFO] H set to {value}")
+    log.info(f"[INFO] H set to {value}")
 
-def set_D(value: float, project) -> None:
+def set_D(value: float, converter_controls) -> None:
     """Update the Dammping D of the VSM controller """
-    BESS_plant0 = project.component(477036609).canvas()
-    BESS_plant1 = BESS_plant0.component(1672393785).canvas()
-    inverter_model = BESS_plant1.component(102488955).canvas()
-    converter_controls = inverter_model.component(952269080).canvas()
     slider_D = converter_controls.component(445867551) 
     slider_D.parameters(Value=value)
-    print(f"[INFO] D set to {value}")
+    log.info(f"[INFO] D set to {value}")
 
-def set_fdroop(value: float, project) -> None:
+def set_fdroop(value: float, BESS_plant1) -> None:
     """Update the frequency droop of the BESS plant """
-    BESS_plant0 = project.component(477036609).canvas()
-    BESS_plant1 = BESS_plant0.component(1672393785).canvas()
     slider_fdroop = BESS_plant1.component(1505948255) 
     slider_fdroop.parameters(Value=value)
-    print(f"[INFO] Fdroop set to {value}")
+    log.info(f"[INFO] Fdroop set to {value}")
 
-def set_inverter_size(value: float, project) -> None:
+def set_inverter_size(value: float, BESS_plant1) -> None:
     """Update the single inverter Sbase (MVA) """
-    BESS_plant0 = project.component(477036609).canvas()
-    BESS_plant1 = BESS_plant0.component(1672393785).canvas()
     inverter_size_constant = BESS_plant1.component(1643639519) 
     inverter_size_constant.parameters(Value=value)
-    print(f"[INFO] Single Inverter Sbase set to {value}")
+    log.info(f"[INFO] Single Inverter Sbase set to {value}")
 
-def set_no_inverters(value: float, project) -> None:
+def set_no_inverters(value: float, BESS_plant0) -> None:
     """Update the number of inverters comprising BESS """
-    BESS_plant0 = project.component(477036609).canvas()
     no_inverter_int = BESS_plant0.component(1834444465) 
     no_inverter_int.parameters(Value=value)
-    print(f"[INFO] Number of Inverters set to {value}")
+    log.info(f"[INFO] Number of Inverters set to {value}")
 
-def set_POD(value: float, project) -> None:
+def set_POD(value: float, converter_controls) -> None:
     """Update the Power Oscillation Damper functionality """
+    POD_en_switch = converter_controls.component(2046559337) 
+    POD_en_switch.parameters(Value=value)
+    log.info(f"[INFO] POD_en set to {value}")
+
+def get_canvases(project) -> tuple:
+    """
+    Resolve the nested BESS canvases once, so setters don't repeat the
+    component/canvas lookups (each one is a call into PSCAD).
+
+    Returns:
+        (BESS_plant0, BESS_plant1, converter_controls) canvases
+    """
     BESS_plant0 = project.component(477036609).canvas()
     BESS_plant1 = BESS_plant0.component(1672393785).canvas()
     inverter_model = BESS_plant1.component(102488955).canvas()
     converter_controls = inverter_model.component(952269080).canvas()
-    POD_en_switch = converter_controls.component(2046559337) 
-    POD_en_switch.parameters(Value=value)
-    print(f"[INFO] POD_en set to {value}")
+    return BESS_plant0, BESS_plant1, converter_controls
+
+# ------------------------------------------------------------------
+# File Helpers
+# ------------------------------------------------------------------
+COPY_BUFSIZE = 1 << 20  # 1 MiB buffer for the userspace copy fallback
+FICLONE = 0x40049409    # Linux ioctl for copy-on-write clones (btrfs/xfs)
+
+def _fast_copy(src: str, dst: str) -> None:
+    """
+    Copy src to dst using the cheapest mechanism the platform offers.
+
+    Windows uses CopyFile2 (kernel-side copy). Linux tries a FICLONE reflink
+    first, then os.copy_file_range. Anything else falls back to a buffered
+    userspace copy.
+
+    Args:
+        src: Path of the file to copy
+        dst: Full destination file path (not a directory)
+    """
+    if sys.platform == "win32":
+        import ctypes
+        if ctypes.windll.kernel32.CopyFile2(
+            ctypes.c_wchar_p(os.path.abspath(src)),
+            ctypes.c_wchar_p(os.path.abspath(dst)),
+            None,
+        ) == 0:
+            return
+
+    elif sys.platform.startswith("linux"):
+        import fcntl
+        with open(src, "rb") as fsrc, open(dst, "wb") as fdst:
+            try:
+                fcntl.ioctl(fdst.fileno(), FICLONE, fsrc.fileno())
+                return
+            except OSError:
+                pass
+            try:
+                remaining = os.fstat(fsrc.fileno()).st_size
+                while remaining > 0:
+                    copied = os.copy_file_range(fsrc.fileno(), fdst.fileno(), remaining)
+                    if copied == 0:
+                        break
+                    remaining -= copied
+                return
+            except OSError:
+                pass
+
+    with open(src, "rb") as fsrc, open(dst, "wb") as fdst:
+        shutil.copyfileobj(fsrc, fdst, COPY_BUFSIZE)
+
+CSV_BUFSIZE = 1 << 18  # 256 KiB write buffer for CSV export
+CSV_ENCODING = "cp1252" # matches the encoding PSCAD uses for output files
+
+def _write_csv(psout: str, csv_path: str) -> None:
+    """
+    Stream a PSCAD output set to CSV, one row at a time.
+
+    Args:
+        psout: Basename of the PSCAD output files (<psout>.inf, <psout>_##.out)
+        csv_path: Absolute path of the CSV file to write
+    """
+    with OutFile(psout) as data, open(csv_path, "w", newline="", encoding=CSV_ENCODING, buffering=CSV_BUFSIZE) as fh:
+        writer = csv.writer(fh)
+        writer.writerow(data.columns())
+        next(data)  # skip the header line of the .out files
+        writer.writerows(data)
+
+COPY_MODES = ("copy", "link")
+
+def _clone_project(src: str, dst: str, copy_mode: str = "copy") -> None:
+    """
+    Place a private working copy of the master project at dst.
+
+    Args:
+        src: Path of the master .pscx file
+        dst: Full destination file path
+        copy_mode: "link" hardlinks the master (no data moved; PSCAD must
+            not write the project back in place), falling back to a copy
+            across filesystems. "copy" makes an independent file, using a
+            reflink clone where the filesystem supports it.
+    """
+    if copy_mode not in COPY_MODES:
+        raise ValueError(f"Unknown copy mode: {copy_mode}")
+
+    if copy_mode == "link":
+        try:
+            os.link(src, dst)
+            return
+        except OSError:
+            pass
+
+    _fast_copy(src, dst)
+
+def init_worker_logging(log_queue) -> None:
+    """
+    Send the log records of this process to log_queue, to be written by a
+    single QueueListener in the parent. The root logger keeps its default
+    WARNING level, so only this repo's loggers (set to INFO) add progress
+    lines; library INFO chatter (mhi.pscad etc.) stays quiet. Without this,
+    records from this module are printed straight to stdout.
+    """
+    root = logging.getLogger()
+    root.handlers[:] = [QueueHandler(log_queue)]
+    log.removeHandler(_stdout_handler)  # records reach stdout via the queue
+    log.propagate = True
+
+RESULT_FILE = "_result.json"
+
+def _write_result(case: str, result: dict) -> None:
+    """
+    Write a worker's result dictionary to the case folder.
+
+    The file is written under a temporary name and then renamed, so a
+    reader never sees a partially written result.
+
+    Args:
+        case: Case folder of the simulation
+        result: Result dictionary to store
+    """
+    path = os.path.join(case, RESULT_FILE)
+    with open(path + ".tmp", "w") as fh:
+        json.dump(result, fh)
+    os.replace(path + ".tmp", path)
 
 # ------------------------------------------------------------------
 # Simulation Worker
 # ------------------------------------------------------------------
 def run_simulation(
     sim : Sim,
-    queue: Queue,
     working_dir: str,
     project_name: str,
     settings: dict,
     fortran_ext: str,
     sim_folder: str,
     time_params: tuple,
+    copy_mode: str = "copy",
+    launch_gate: Event = None,
+    log_queue=None,
 ) -> None:
     """
     Worker process that:
       1. Creates a unique case folder.
-      2. Copies the master .pscx file into it.
+      2. Copies (or links, see copy_mode) the master .pscx file into it.
       3. Launches PSCAD, loads the project, sets parameters, and runs.
-      4. Returns the path to the .psout file via the provided queue.
+         launch_gate (if given) is set once the project is loaded, or on
+         failure, so the parent can start the next worker.
+      4. Records the path to the .psout file in <case>/_result.json.
+    Log records are forwarded to the parent through log_queue (if given).
     """
+    if log_queue is not None:
+        init_worker_logging(log_queue)
+
+    master = os.path.join(working_dir, f"{project_name}.pscx")
+    case = os.path.join(sim_folder, sim.test_name)
     try:
         # --- 1. Prepare case folder -------------------------------------------------
-        master = os.path.join(working_dir, f"{project_name}.pscx")
-        case = os.path.join(sim_folder, sim.test_name)
         if os.path.exists(case):
             shutil.rmtree(case)
         os.makedirs(case)
-        shutil.copy(master, case)
+        _clone_project(master, os.path.join(case, f"{project_name}.pscx"), copy_mode)
 
         # --- 2. Launch PSCAD and load project ---------------------------------------
         pscad = mhi.pscad.launch(version="5.0.2", settings=settings)
@@ -137,6 +286,8 @@ def run_simulation(
             raise RuntimeError("Failed to launch PSCAD")
 
         pscad.load([os.path.join(case, f"{project_name}.pscx")])
+        if launch_gate is not None:
+            launch_gate.set()
         project = pscad.project(project_name)
         project.parameters(
             output_filename=sim.test_name,
@@ -150,73 +301,136 @@ def run_simulation(
         set_PrefA(sim.prefA, main)
         set_SCL(sim.scl, main)
         set_XR_ratio(sim.xr, main)
-        set_H(sim.H, main)
-        set_D(sim.D, main)
-        set_fdroop(sim.fdroop, main)
-        set_POD(sim.POD_en, main)
-        set_inverter_size(sim.inverter_size, main)
-        set_no_inverters(sim.no_inverters, main)
-
-        print(f"[RUN] {sim.test_name}")
+        BESS_plant0, BESS_plant1, converter_controls = get_canvases(main)
+        set_H(sim.H, converter_controls)
+        set_D(sim.D, converter_controls)
+        set_fdroop(sim.fdroop, BESS_plant1)
+        set_POD(sim.POD_en, converter_controls)
+        set_inverter_size(sim.inverter_size, BESS_plant1)
+        set_no_inverters(sim.no_inverters, BESS_plant0)
+
+        log.info(f"[RUN] {sim.test_name}")
         project.run()
 
         psout_path = os.path.join(case, f"{project_name}{fortran_ext}", sim.test_name)
 
         # --- 4. Signal success -------------------------------------------------------
-        queue.put({
+        _write_result(case, {
             "psout_path": psout_path,
             "test_name": sim.test_name,
             "success": True
         })
-        print(f"[OK ] {sim.test_name} completed successfully")
+        log.info(f"[OK ] {sim.test_name} completed successfully")
 
         pscad.quit()
 
     except Exception as e:
-        print(f"[ERR] {sim.test_name} failed: {e}\n")
-        queue.put({"success": False, "error": str(e)})
+        log.error(f"[ERR] {sim.test_name} failed: {e}")
+        if launch_gate is not None:
+            launch_gate.set()
+        if os.path.isdir(case):
+            _write_result(case, {"test_name": sim.test_name, "success": False, "error": str(e)})
 
 
 # ------------------------------------------------------------------
 # Result Processing
 # ------------------------------------------------------------------
 
-def collect_results(results_queue: Queue) -> list:
+def collect_results(sim_folder: str, n_expected: int = None) -> list:
     """
-    Collect all successful simulation results from the queue.
+    Collect all successful simulation results from the case folders.
     
     Args:
-        results_queue: Multiprocessing queue containing simulation results
+        sim_folder: Directory containing all simulation folders
+        n_expected: Number of simulations that were launched (optional;
+            if given, missing result files are reported)
         
     Returns:
         List of successful test result dictionaries
     """
 
-    print("[INFO] Collecting results...")
+    log.info("[INFO] Collecting results...")
+    paths = sorted(glob.glob(os.path.join(sim_folder, "*", RESULT_FILE)))
+    if n_expected is not None and len(paths) < n_expected:
+        log.error(f"[ERR] {n_expected - len(paths)} of {n_expected} simulations left no result")
+
     test_results = []
-    while not results_queue.empty():
-        res = results_queue.get()
+    for path in paths:
+        with open(path) as fh:
+            res = json.load(fh)
         if res.get("success"):
             test_results.append(res)
     return test_results
 
-def convert_results_to_csv(test_results: list, simulations_dir: str, working_dir: str) -> None:
+def _convert_one(case: dict, simulations_dir: str) -> str:
     """
-    Convert .psout files to CSV format for all successful test cases.
+    Convert a single test case's .psout files to CSV.
+
+    Args:
+        case: Result dictionary from a completed simulation
+        simulations_dir: Directory containing all simulation folders
+
+    Returns:
+        Name of the CSV file written
+    """
+    name = case["test_name"]
+    csv_name = f"{name}.csv"
+    _write_csv(case["psout_path"], os.path.join(simulations_dir, name, csv_name))
+    return csv_name
+
+def convert_results_to_csv(test_results: list, simulations_dir: str, mp_context=None) -> None:
+    """
+    Convert .psout files to CSV format for all successful test cases,
+    one worker process per case (up to the number of CPUs).
     
     Args:
         test_results: List of result dictionaries from completed simulations
         simulations_dir: Directory containing all simulation folders
-        working_dir: Base working directory to return to
+        mp_context: multiprocessing context for the conversion processes
+            (optional; defaults to the platform's start method)
     """
-    for case in test_results:
-        psout = case["psout_path"]
-        name = case["test_name"]
-        csv_name = f"{name}.csv"
+    if not test_results:
+        return
 
-        os.chdir(os.path.join(simulations_dir, name))
-        OutFile(psout).toCSV(csv_name)
-        os.chdir(working_dir)
-        print(f"[SAVE] {csv_name}")
+    max_workers = min(len(test_results), os.cpu_count() or 1)
+    with ProcessPoolExecutor(max_workers=max_workers, mp_context=mp_context) as ex:
+        for csv_name in ex.map(partial(_convert_one, simulations_dir=simulations_dir), test_results):
+            log.info(f"[SAVE] {csv_name}")
 
+def result_columns(psout: str) -> list:
+    """
+    Column names of a PSCAD output set, in the order used by load_results.
 
+    Args:
+        psout: Basename of the PSCAD output files
+
+    Returns:
+        List of column names, starting with "TIME"
+    """
+    return list(OutFile(psout).columns())  # only reads the .inf file
+
+def _load_one(psout: str) -> "np.ndarray":
+    """
+    Read a PSCAD output set straight into a (rows, columns) float array.
+    """
+    import numpy as np  # only needed here; keeps it out of worker start-up
+
+    with OutFile(psout) as data:
+        n_cols = len(data.columns())
+        next(data)  # skip the header line of the .out files
+        values = np.fromiter(map(float, chain.from_iterable(data)), dtype=np.float64)
+    return values.reshape(-1, n_cols)
+
+def load_results(test_results: list) -> dict:
+    """
+    Load the .psout data of all successful test cases without going
+    through CSV.
+
+    Args:
+        test_results: List of result dictionaries from completed simulations
+
+    Returns:
+        Dictionary of test name -> ndarray (rows = samples, columns as
+        given by result_columns)
+    """
+    return {case["test_name"]: _load_one(case["psout_path"]) for case in test_results}